@@ -1,6 +1,12 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, request
 from flask_cors import CORS
+from flask_orjson import OrjsonProvider
+import atexit
+import logging
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+import orjson
 from dotenv import load_dotenv
 from services import task_service # Import the task service
 from models.task_model import Task # Import the Task class for type hinting and .to_dict()
@@ -9,75 +15,232 @@ from models.task_model import Task # Import the Task class for type hinting and
 load_dotenv()
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app) # Usa orjson para serializar/parsear JSON (más rápido que el módulo json estándar)
 CORS(app) # Habilita CORS para permitir solicitudes desde el frontend
 
+class _DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of raising."""
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass # Mejor perder un log que bloquear o romper la petición
+
+class _LogFormatter(logging.Formatter):
+    """Flask's default log format; Werkzeug request lines are written as-is (they carry their own timestamp)."""
+    def format(self, record):
+        if record.name == "werkzeug":
+            return record.getMessage()
+        return super().format(record)
+
+def _setup_queue_logging(max_records=10000):
+    """Moves log I/O off the request threads.
+
+    The app and Werkzeug loggers only put records on a bounded in-memory queue; a single
+    background thread (QueueListener) writes them to stderr.
+    """
+    log_queue = queue.Queue(max_records)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(_LogFormatter("[%(asctime)s] %(levelname)s in %(module)s: %(message)s"))
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop) # Vacía la cola al terminar el proceso
+    queue_handler = _DroppingQueueHandler(log_queue)
+    for logger in (app.logger, logging.getLogger("werkzeug")):
+        logger.handlers[:] = [queue_handler] # Reemplaza los handlers por defecto
+    if logging.getLogger("werkzeug").level == logging.NOTSET:
+        logging.getLogger("werkzeug").setLevel(logging.INFO) # Conserva el log de peticiones del servidor de desarrollo
+
+_setup_queue_logging()
+
+# Cuerpos constantes serializados una sola vez al iniciar el proceso.
+# Se crea un Response nuevo por petición (barato) porque Flask-CORS modifica sus cabeceras.
+_HOME_BODY = orjson.dumps({"message": "¡Bienvenido a la API de Gestión de Tareas!"})
+_HEALTH_BODY = orjson.dumps({"status": "UP", "version": os.environ.get("APP_VERSION", "1.0.0")})
+_NOT_FOUND_BODY = orjson.dumps({"error": "Tarea no encontrada"})
+_DELETED_BODY = orjson.dumps({"message": "Tarea eliminada exitosamente"})
+
+def _json(obj, status=200):
+    """Builds a JSON response serializing `obj` directly with orjson (no jsonify)."""
+    return Response(orjson.dumps(obj), status=status, mimetype="application/json")
+
+def _not_found():
+    """Builds the 404 response for a missing task from the precomputed body."""
+    return Response(_NOT_FOUND_BODY, status=404, mimetype="application/json")
+
+def _payload():
+    """Parses the request body once with orjson. Returns None if it is not a JSON object."""
+    try:
+        data = orjson.loads(request.get_data(cache=True) or b"{}")
+    except orjson.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+def _invalid_body():
+    """Builds the 400 response for a body that is not a JSON object."""
+    return _json({"error": "El cuerpo debe ser un objeto JSON"}, 400)
+
 @app.route('/')
 def home():
-    return jsonify(message="¡Bienvenido a la API de Gestión de Tareas!")
+    return Response(_HOME_BODY, mimetype="application/json")
 
 @app.route('/health')
 def health_check():
-    return jsonify(status="UP", version=os.environ.get("APP_VERSION", "1.0.0"))
+    return Response(_HEALTH_BODY, mimetype="application/json")
 
 # --- Endpoints de la API para Tareas ---
 
 # OBTENER todas las tareas
 @app.route('/api/tasks', methods=['GET'])
 def get_tasks():
-    # Convert Task objects to dictionaries for jsonify
-    return jsonify([task.to_dict() for task in task_service.get_all_tasks()])
+    # The service keeps the serialized list cached until the next mutation;
+    # very large lists are not cached and are streamed instead
+    version, payload = task_service.get_all_tasks_serialized()
+    # El ETag es la versión de los datos: si el cliente ya tiene esa versión, responde 304 sin cuerpo.
+    # If-None-Match usa comparación débil: los proxies que comprimen (p. ej. nginx con gzip) envían W/"v…"
+    etag = f"v{version}"
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    chunks = None
+    if payload is None:
+        # El ETag sale del mismo snapshot que el cuerpo
+        version, chunks = task_service.iter_task_chunks()
+        payload = _stream_tasks(chunks)
+    response = Response(payload, mimetype="application/json")
+    response.set_etag(f"v{version}")
+    if chunks is not None:
+        # Cierra el snapshot aunque el cuerpo no se llegue a recorrer (HEAD, cliente desconectado)
+        response.call_on_close(chunks.close)
+    return response
+
+def _stream_tasks(chunks):
+    """Serializes the task list chunk by chunk, so peak memory does not grow with the list."""
+    yield b"["
+    separator = b""
+    for chunk in chunks:
+        yield separator + b",".join(orjson.dumps(task.to_dict()) for task in chunk)
+        separator = b","
+    yield b"]"
 
 # OBTENER una tarea específica por ID
 @app.route('/api/tasks/<int:task_id>', methods=['GET'])
 def get_task(task_id):
     task = task_service.get_task_by_id(task_id)
     if task:
-        return jsonify(task.to_dict()) # Convert Task object to dictionary
-    return jsonify(error="Tarea no encontrada"), 404
+        return _json(task.to_dict()) # Convert Task object to dictionary
+    return _not_found()
 
 # CREAR una nueva tarea
 @app.route('/api/tasks', methods=['POST'])
 def create_task():
-    data = request.json
-    
-    if not data or 'title' not in data:
-        return jsonify(error="El campo 'title' es requerido"), 400
+    data = _payload()
+    if data is None:
+        return _invalid_body()
+
+    if 'title' not in data:
+        return _json({"error": "El campo 'title' es requerido"}, 400)
         
     try:
         new_task = task_service.create_task(data['title'], data.get('completed', False))
-        return jsonify(new_task.to_dict()), 201 # Convert Task object to dictionary
+        return _json(new_task.to_dict(), 201) # Convert Task object to dictionary
     except ValueError as e: # Catch validation errors from Task model
-        return jsonify(error=str(e)), 400
+        return _json({"error": str(e)}, 400)
 
 # ACTUALIZAR una tarea existente (PUT)
 @app.route('/api/tasks/<int:task_id>', methods=['PUT'])
 def update_task(task_id):
-    data = request.json
-    
-    # Optional: Basic validation for title/completed if provided
-    if 'title' in data and not isinstance(data['title'], str):
-        return jsonify(error="El campo 'title' debe ser una cadena de texto"), 400
-    if 'completed' in data and 'completed' in data and not isinstance(data['completed'], bool):
-        return jsonify(error="El campo 'completed' debe ser un booleano"), 400
-
-    updated_task = task_service.update_task(
-        task_id,
-        title=data.get('title'),
-        completed=data.get('completed')
-    )
+    data = _payload()
+    if data is None:
+        return _invalid_body()
+
+    # Solo se aplican los campos presentes; el resto del cuerpo se ignora
+    fields = {k: data[k] for k in Task.UPDATABLE_FIELDS if k in data}
+    try:
+        updated_task = task_service.apply_updates(task_id, fields)
+    except ValueError as e: # Catch validation errors from Task model
+        return _json({"error": str(e)}, 400)
     if updated_task:
-        return jsonify(updated_task.to_dict()) # Convert Task object to dictionary
-    return jsonify(error="Tarea no encontrada"), 404
+        return _json(updated_task.to_dict()) # Convert Task object to dictionary
+    return _not_found()
+
+# OPERACIONES EN LOTE: crea, actualiza y elimina varias tareas en una sola petición
+# El lote mantiene el bloqueo de escritura de SQLite mientras se ejecuta, así que su tamaño está acotado.
+MAX_BATCH_OPERATIONS = 500
+
+@app.route('/api/tasks/batch', methods=['POST'])
+def batch_tasks():
+    data = _payload()
+    if data is None:
+        return _invalid_body()
+    creates = data.get('create', [])
+    updates = data.get('update', [])
+    deletes = data.get('delete', [])
+    if not all(isinstance(ops, list) for ops in (creates, updates, deletes)):
+        return _json({"error": "Los campos 'create', 'update' y 'delete' deben ser listas"}, 400)
+    if len(creates) + len(updates) + len(deletes) > MAX_BATCH_OPERATIONS:
+        return _json({"error": f"El lote no puede tener más de {MAX_BATCH_OPERATIONS} operaciones"}, 413)
+
+    results = []
+    # Todas las operaciones se ejecutan en una única transacción; cada una informa su propio resultado.
+    # Una operación con datos inválidos (ValueError) solo deshace su savepoint y responde 400.
+    with task_service.batch():
+        for item in creates:
+            if not isinstance(item, dict) or 'title' not in item:
+                results.append({"op": "create", "status": 400, "error": "El campo 'title' es requerido"})
+                continue
+            try:
+                new_task = task_service.create_task(item['title'], item.get('completed', False))
+                results.append({"op": "create", "status": 201, "task": new_task.to_dict()})
+            except ValueError as e: # Catch validation errors from Task model
+                results.append({"op": "create", "status": 400, "error": str(e)})
+
+        for item in updates:
+            # type() en vez de isinstance(): bool es subclase de int y true no es un ID
+            if not isinstance(item, dict) or type(item.get('id')) is not int:
+                results.append({"op": "update", "status": 400, "error": "El campo 'id' es requerido"})
+                continue
+            fields = {k: item[k] for k in Task.UPDATABLE_FIELDS if k in item}
+            try:
+                updated_task = task_service.apply_updates(item['id'], fields)
+            except ValueError as e: # Catch validation errors from Task model
+                results.append({"op": "update", "id": item['id'], "status": 400, "error": str(e)})
+                continue
+            if updated_task:
+                results.append({"op": "update", "id": item['id'], "status": 200, "task": updated_task.to_dict()})
+            else:
+                results.append({"op": "update", "id": item['id'], "status": 404, "error": "Tarea no encontrada"})
+
+        for task_id in deletes:
+            if type(task_id) is not int:
+                results.append({"op": "delete", "status": 400, "error": "El ID debe ser un entero"})
+            elif task_service.delete_task(task_id):
+                results.append({"op": "delete", "id": task_id, "status": 200})
+            else:
+                results.append({"op": "delete", "id": task_id, "status": 404, "error": "Tarea no encontrada"})
+
+    return _json({"results": results})
 
 # ELIMINAR una tarea
 @app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
 def delete_task(task_id):
     if task_service.delete_task(task_id):
-        return jsonify(message="Tarea eliminada exitosamente"), 200
-    return jsonify(error="Tarea no encontrada"), 404
+        return Response(_DELETED_BODY, mimetype="application/json")
+    return _not_found()
+
+# REINICIAR el estado (solo para pruebas de integración)
+# La ruta solo existe si ENABLE_TEST_RESET=1, para que nunca quede expuesta en producción.
+if os.environ.get('ENABLE_TEST_RESET') == '1':
+    @app.route('/api/internal/reset', methods=['POST'])
+    def reset_state():
+        task_service._reset_state()
+        return Response(status=204)
 
 # -----------------------------------------
 
 if __name__ == '__main__':
+    # Servidor de desarrollo de Werkzeug. En producción se usa Gunicorn (ver Dockerfile).
+    # El modo debug (recarga automática y depurador) solo se activa con FLASK_DEBUG=1.
     port = int(os.environ.get('PORT', 5000))
-    app.run(debug=True, host='0.0.0.0', port=port)
\ No newline at end of file
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', host='0.0.0.0', port=port, threaded=True)
\ No newline at end of file
@@ -0,0 +1,10 @@
+# backend/gunicorn.conf.py
+# Configuración de Gunicorn (se carga automáticamente desde el directorio de trabajo).
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+# Un proceso por núcleo: las tareas están en SQLite, así que todos los workers ven los mismos datos.
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
@@ -1,19 +1,59 @@
 # backend/models/task_model.py
+# Fully annotated so it can be compiled with mypyc (see setup.py); it also runs as plain Python.
+from typing import Any, ClassVar
+
+# Returned to API clients as-is, in the API's language (Spanish). A value of the wrong type
+# and an empty title get different messages.
+_FIELD_ERRORS = {
+    "id": "El campo 'id' debe ser un entero positivo",
+    "title_type": "El campo 'title' debe ser una cadena de texto",
+    "title": "El campo 'title' no puede estar vacío",
+    "completed": "El campo 'completed' debe ser un booleano",
+}
 
 class Task:
-    def __init__(self, id: int, title: str, completed: bool = False):
-        if not isinstance(id, int) or id <= 0:
-            raise ValueError("Task ID must be a positive integer.")
-        if not isinstance(title, str) or not title.strip():
-            raise ValueError("Task title cannot be empty.")
-        if not isinstance(completed, bool):
-            raise ValueError("Task 'completed' status must be a boolean.")
+    # Fixed attribute layout: no per-instance __dict__, smaller objects and faster attribute access
+    __slots__ = ("id", "title", "completed")
 
+    def __init__(self, id: int, title: str, completed: bool = False):
+        # Plain assignment only; use Task.create() to build a Task from untrusted input.
         self.id = id
         self.title = title
         self.completed = completed
 
-    def to_dict(self):
+    @classmethod
+    def create(cls, id: Any, title: Any, completed: Any = False) -> "Task":
+        """Validates the given fields and creates a Task object.
+
+        Validation uses exact type checks (`type(x) is int`) rather than isinstance(): subclasses
+        are not expected here, and bools are rejected as IDs. `not title or title.isspace()` avoids
+        the copy that `title.strip()` makes.
+        """
+        # Parameters are typed Any because they come from untrusted JSON: when compiled with
+        # mypyc, narrower annotations would raise TypeError before reaching these checks.
+        if type(id) is not int or id <= 0:
+            raise ValueError(_FIELD_ERRORS["id"])
+        cls.validate_fields({"title": title, "completed": completed})
+        return cls(id, title, completed)
+
+    # Fields that can change after creation
+    UPDATABLE_FIELDS: ClassVar[tuple[str, ...]] = ("title", "completed")
+
+    @staticmethod
+    def validate_fields(fields: dict[str, Any]) -> None:
+        """Validates title/completed values. Only the keys present in `fields` are checked,
+        so it serves both new tasks and partial updates."""
+        if "title" in fields and type(title := fields["title"]) is not str:
+            field = "title_type"
+        elif "title" in fields and (not title or title.isspace()):
+            field = "title"
+        elif "completed" in fields and type(fields["completed"]) is not bool:
+            field = "completed"
+        else:
+            return
+        raise ValueError(_FIELD_ERRORS[field])
+
+    def to_dict(self) -> dict[str, Any]:
         """Converts the Task object to a dictionary."""
         return {
             "id": self.id,
@@ -22,16 +62,16 @@ class Task:
         }
 
     @staticmethod
-    def from_dict(data: dict):
+    def from_dict(data: dict[str, Any]) -> "Task":
         """Creates a Task object from a dictionary."""
         if not all(k in data for k in ['id', 'title', 'completed']):
             raise ValueError("Dictionary must contain 'id', 'title', and 'completed' keys.")
-        return Task(data['id'], data['title'], data['completed'])
+        return Task.create(data['id'], data['title'], data['completed'])
 
-    def __repr__(self):
+    def __repr__(self) -> str:
         return f"Task(id={self.id}, title='{self.title}', completed={self.completed})"
 
-    def __eq__(self, other):
+    def __eq__(self, other: object) -> bool:
         if not isinstance(other, Task):
             return NotImplemented
         return self.id == other.id and self.title == other.title and self.completed == other.completed
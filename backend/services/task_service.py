@@ -1,45 +1,259 @@
 # backend/services/task_service.py
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+import orjson
 from models.task_model import Task # Import the Task class
 
-tasks: list[Task] = []
-task_id_counter = 1
+# Ruta de la base de datos SQLite. Todos los workers de Gunicorn comparten el mismo archivo.
+DATABASE_PATH = os.environ.get(
+    "DATABASE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tasks.db"),
+)
+
+# `tasks_meta.version` is bumped by triggers on every change to `tasks`, so any process can tell
+# whether its cached payload is still current with a single-row read.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    completed INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks_meta (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO tasks_meta (id, version) VALUES (1, 0);
+CREATE TRIGGER IF NOT EXISTS tasks_after_insert AFTER INSERT ON tasks
+BEGIN UPDATE tasks_meta SET version = version + 1 WHERE id = 1; END;
+CREATE TRIGGER IF NOT EXISTS tasks_after_update AFTER UPDATE ON tasks
+BEGIN UPDATE tasks_meta SET version = version + 1 WHERE id = 1; END;
+CREATE TRIGGER IF NOT EXISTS tasks_after_delete AFTER DELETE ON tasks
+BEGIN UPDATE tasks_meta SET version = version + 1 WHERE id = 1; END;
+"""
+
+# Task lists longer than this are not cached in memory; the API streams them instead.
+MAX_CACHED_TASKS = 1000
+
+# One connection per thread: sqlite3 connections must not be shared across threads.
+_local = threading.local()
+# Whether this process already created the schema; later connections skip that step.
+_schema_ready = False
+_schema_lock = threading.Lock()
+# (data version, serialized JSON of all tasks). A single tuple, replaced as a whole, so a reader
+# can never pair one version with another version's payload. The payload is None when that
+# version has too many tasks to cache, so the table is not probed again until it changes.
+_cache: tuple[int, bytes | None] | None = None
+
+def _get_connection() -> sqlite3.Connection:
+    """Returns this thread's connection, opening it on first use.
+
+    The schema is only created once per process; later connections just open the file.
+    """
+    global _schema_ready
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        # isolation_level=None: autocommit; transactions are opened explicitly in _transaction()
+        conn = sqlite3.connect(DATABASE_PATH, isolation_level=None, timeout=10)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not _schema_ready:
+            with _schema_lock:
+                if not _schema_ready:
+                    conn.execute("PRAGMA journal_mode=WAL") # Persistent: stored in the database file
+                    conn.executescript(_SCHEMA)
+                    _schema_ready = True
+        _local.conn = conn
+    return conn
+
+@contextmanager
+def _transaction():
+    """Runs the enclosed statements in a single write transaction.
+
+    Inside batch(), a savepoint is used instead, so an error only undoes the enclosed statements
+    and the batch can continue. Any other open transaction is an error, not something to nest in.
+    """
+    conn = _get_connection()
+    if getattr(_local, "in_batch", False):
+        conn.execute("SAVEPOINT task_op")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK TO task_op")
+            conn.execute("RELEASE task_op")
+            raise
+        conn.execute("RELEASE task_op")
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+@contextmanager
+def batch():
+    """Groups the service calls made inside the block in one transaction (one lock, one commit)."""
+    with _transaction():
+        _local.in_batch = True
+        try:
+            yield
+        finally:
+            _local.in_batch = False
+
+# SQLite INTEGER is 64-bit signed: larger IDs can't exist and can't even be bound as parameters
+_MAX_TASK_ID = 2**63 - 1
+
+def _is_storable_id(task_id: int) -> bool:
+    return 0 < task_id <= _MAX_TASK_ID
+
+def _row_to_task(row) -> Task:
+    return Task(row[0], row[1], bool(row[2]))
 
 def _reset_state():
-    """Resets the in-memory task storage for testing purposes."""
-    global tasks
-    global task_id_counter
-    tasks = []
-    task_id_counter = 1
+    """Deletes every task and restarts the ID sequence, for testing purposes."""
+    global _cache
+    with _transaction() as conn:
+        conn.execute("DELETE FROM tasks")
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'tasks'")
+    _cache = None
 
 def get_all_tasks() -> list[Task]:
     """Returns all tasks."""
-    return list(tasks) # Return a copy to prevent external modification
+    rows = _get_connection().execute("SELECT id, title, completed FROM tasks ORDER BY id")
+    return [_row_to_task(row) for row in rows]
+
+def get_tasks_version() -> int:
+    """Returns the current data version; it increases on every create, update or delete."""
+    return _get_connection().execute("SELECT version FROM tasks_meta WHERE id = 1").fetchone()[0]
+
+def get_all_tasks_serialized() -> tuple[int, bytes | None]:
+    """Returns the data version and all tasks serialized as a JSON array.
+
+    The serialized bytes are cached and reused while the version does not change. If there are
+    more than MAX_CACHED_TASKS tasks, returns None instead of the bytes: use iter_task_chunks().
+    """
+    global _cache
+    conn = _get_connection()
+    version = get_tasks_version()
+    cache = _cache # Read once: other threads may replace it meanwhile
+    if cache is not None and cache[0] == version:
+        return cache
+    # Read the version and the rows from the same snapshot
+    conn.execute("BEGIN")
+    try:
+        (version,) = conn.execute("SELECT version FROM tasks_meta WHERE id = 1").fetchone()
+        cursor = conn.execute("SELECT id, title, completed FROM tasks ORDER BY id")
+        rows = cursor.fetchmany(MAX_CACHED_TASKS + 1)
+        cursor.close()
+    finally:
+        conn.execute("COMMIT")
+    if len(rows) > MAX_CACHED_TASKS:
+        _cache = (version, None)
+        return _cache
+    payload = orjson.dumps([_row_to_task(row).to_dict() for row in rows])
+    _cache = (version, payload)
+    return _cache
+
+class _TaskChunks:
+    """Iterator over a read snapshot of all tasks, as lists of Tasks in ID order.
+
+    The snapshot's read transaction stays open until the rows run out or close() is called.
+    """
+    def __init__(self, conn: sqlite3.Connection, cursor: sqlite3.Cursor, chunk_size: int):
+        self._conn = conn
+        self._cursor: sqlite3.Cursor | None = cursor
+        self._chunk_size = chunk_size
+
+    def __iter__(self) -> "_TaskChunks":
+        return self
+
+    def __next__(self) -> list[Task]:
+        rows = self._cursor.fetchmany(self._chunk_size) if self._cursor is not None else []
+        if not rows:
+            self.close()
+            raise StopIteration
+        return [_row_to_task(row) for row in rows]
+
+    def close(self) -> None:
+        """Ends the snapshot. Safe to call more than once, and before iterating."""
+        if self._cursor is not None:
+            self._cursor.close()
+            self._cursor = None
+            self._conn.execute("COMMIT")
+
+def iter_task_chunks(chunk_size: int = 500) -> tuple[int, _TaskChunks]:
+    """Opens a read snapshot of all tasks and returns (data version, chunks).
+
+    `chunks` yields lists of up to `chunk_size` tasks, so only one chunk of rows is held in memory
+    at a time; the version belongs to the same snapshot (use it as the ETag). The caller must
+    call chunks.close() if it may stop before the end.
+    """
+    conn = _get_connection()
+    conn.execute("BEGIN")
+    try:
+        (version,) = conn.execute("SELECT version FROM tasks_meta WHERE id = 1").fetchone()
+        cursor = conn.execute("SELECT id, title, completed FROM tasks ORDER BY id")
+    except BaseException:
+        conn.execute("COMMIT")
+        raise
+    return version, _TaskChunks(conn, cursor, chunk_size)
 
 def get_task_by_id(task_id: int) -> Task | None:
     """Returns a task by its ID."""
-    return next((t for t in tasks if t.id == task_id), None)
+    if not _is_storable_id(task_id):
+        return None
+    row = _get_connection().execute(
+        "SELECT id, title, completed FROM tasks WHERE id = ?", (task_id,)
+    ).fetchone()
+    return _row_to_task(row) if row else None
 
 def create_task(title: str, completed: bool = False) -> Task:
-    """Creates a new task and returns it."""
-    global task_id_counter
-    new_task = Task(id=task_id_counter, title=title, completed=completed)
-    tasks.append(new_task)
-    task_id_counter += 1
-    return new_task
+    """Creates a new task and returns it. Raises ValueError if a field is invalid."""
+    # Validate before touching the database: invalid values never reach SQLite and no ID is consumed
+    Task.validate_fields({"title": title, "completed": completed})
+    with _transaction() as conn:
+        (new_id,) = conn.execute(
+            "INSERT INTO tasks (title, completed) VALUES (?, ?) RETURNING id", (title, completed)
+        ).fetchone()
+    return Task(new_id, title, completed)
 
 def update_task(task_id: int, title: str | None = None, completed: bool | None = None) -> Task | None:
-    """Updates an existing task and returns the updated task."""
-    task = get_task_by_id(task_id)
-    if task:
-        if title is not None:
-            task.title = title
-        if completed is not None:
-            task.completed = completed
-    return task
+    """Updates an existing task and returns the updated task. None leaves a field unchanged.
+
+    Raises ValueError if a given field is invalid.
+    """
+    fields = {}
+    if title is not None:
+        fields["title"] = title
+    if completed is not None:
+        fields["completed"] = completed
+    return apply_updates(task_id, fields)
+
+def apply_updates(task_id: int, fields: dict) -> Task | None:
+    """Applies a partial update ({"title": ..., "completed": ...}) with a single statement.
+
+    Returns the updated task, or None if it does not exist. Raises ValueError if a field is invalid.
+    """
+    Task.validate_fields(fields)
+    if not _is_storable_id(task_id):
+        return None
+    # Column names come from a fixed list, never from the caller's keys
+    columns = [name for name in Task.UPDATABLE_FIELDS if name in fields]
+    if not columns:
+        return get_task_by_id(task_id)
+    assignments = ", ".join(f"{name} = ?" for name in columns)
+    with _transaction() as conn:
+        row = conn.execute(
+            f"UPDATE tasks SET {assignments} WHERE id = ? RETURNING id, title, completed",
+            (*(fields[name] for name in columns), task_id),
+        ).fetchone()
+    return _row_to_task(row) if row else None
 
 def delete_task(task_id: int) -> bool:
     """Deletes a task by its ID. Returns True if deleted, False otherwise."""
-    global tasks
-    initial_len = len(tasks)
-    tasks = [t for t in tasks if t.id != task_id]
-    return len(tasks) < initial_len # Returns True if a task was deleted
+    if not _is_storable_id(task_id):
+        return False
+    with _transaction() as conn:
+        return conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,)).rowcount > 0
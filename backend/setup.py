@@ -0,0 +1,13 @@
+# backend/setup.py
+# Compilación opcional del modelo con mypyc (extensión C). La aplicación funciona igual sin ella.
+#   pip install mypy
+#   python setup.py build_ext --inplace
+# Genera models/task_model.cpython-*.so junto al .py; Python carga la extensión compilada en su lugar.
+from setuptools import setup
+from mypyc.build import mypycify
+
+setup(
+    name="task-api-compiled",
+    # --explicit-package-bases: `models` no tiene __init__.py, así el módulo se llama models.task_model
+    ext_modules=mypycify(["--explicit-package-bases", "models/task_model.py"]),
+)
@@ -0,0 +1,16 @@
+import os
+import shutil
+import tempfile
+import pytest
+
+# Las pruebas usan una base de datos SQLite temporal para no tocar backend/tasks.db.
+# Debe definirse antes de que se importe `services.task_service`. Se asigna siempre (aunque
+# DATABASE_PATH ya esté definida) porque las pruebas borran todas las tareas de la base de datos.
+_TEST_DB_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_PATH"] = os.path.join(_TEST_DB_DIR, "tasks_test.db")
+
+@pytest.fixture(scope="session", autouse=True)
+def test_database_dir():
+    """Elimina el directorio de la base de datos temporal al terminar la sesión de pruebas."""
+    yield _TEST_DB_DIR
+    shutil.rmtree(_TEST_DB_DIR, ignore_errors=True)
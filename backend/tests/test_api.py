@@ -1,5 +1,7 @@
+import sqlite3
+import threading
 import pytest
-from app import app as flask_app # Only import flask_app
+from app import app as flask_app, MAX_BATCH_OPERATIONS
 from services import task_service # Import task_service for resetting state
 
 # 'fixture' es un concepto de pytest.
@@ -63,6 +65,83 @@ def test_get_all_tasks_with_data(client):
     assert json_data[0]['title'] == 'Tarea 1'
     assert json_data[1]['title'] == 'Tarea 2'
 
+def test_get_all_tasks_reflects_updates(client):
+    """
+    GIVEN un cliente de prueba de Flask con una tarea ya listada
+    WHEN se actualiza la tarea y se vuelve a pedir '/api/tasks'
+    THEN la lista debe contener los datos actualizados (la caché se invalida)
+    """
+    client.post('/api/tasks', json={'title': 'Tarea 1'})
+    assert client.get('/api/tasks').get_json()[0]['completed'] is False
+    client.put('/api/tasks/1', json={'completed': True})
+    response = client.get('/api/tasks')
+    assert response.status_code == 200
+    assert response.get_json()[0]['completed'] is True
+
+def test_get_all_tasks_etag_not_modified(client):
+    """
+    GIVEN un cliente de prueba de Flask que ya obtuvo '/api/tasks' con su ETag
+    WHEN vuelve a pedir la lista enviando If-None-Match con ese ETag
+    THEN la respuesta debe ser 304 mientras no cambien las tareas, y 200 después de un cambio
+    """
+    client.post('/api/tasks', json={'title': 'Tarea 1'})
+    first = client.get('/api/tasks')
+    etag = first.headers['ETag']
+    assert etag
+
+    not_modified = client.get('/api/tasks', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+
+    # Un proxy que comprime la respuesta reenvía el ETag como débil
+    weak = client.get('/api/tasks', headers={'If-None-Match': f'W/{etag}'})
+    assert weak.status_code == 304
+
+    client.post('/api/tasks', json={'title': 'Tarea 2'})
+    modified = client.get('/api/tasks', headers={'If-None-Match': etag})
+    assert modified.status_code == 200
+    assert modified.headers['ETag'] != etag
+    assert len(modified.get_json()) == 2
+
+def test_get_all_tasks_streamed_when_large(client, monkeypatch):
+    """
+    GIVEN un cliente de prueba de Flask con más tareas que el límite de la caché
+    WHEN se hace una petición GET a '/api/tasks'
+    THEN la lista se envía en streaming, sigue siendo un JSON válido y ordenado, y lleva el ETag de sus datos
+    """
+    monkeypatch.setattr(task_service, 'MAX_CACHED_TASKS', 2)
+    for i in range(5):
+        client.post('/api/tasks', json={'title': f'Tarea {i}'})
+    response = client.get('/api/tasks')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert [t['title'] for t in response.get_json()] == [f'Tarea {i}' for i in range(5)]
+    assert response.get_etag()[0] == f"v{task_service.get_tasks_version()}"
+
+    # Mientras no cambien los datos, la lista se sigue enviando en streaming sin volver a sondear la tabla
+    assert task_service._cache == (task_service.get_tasks_version(), None)
+    with client.get('/api/tasks') as response:
+        assert response.is_streamed
+
+def test_streamed_list_does_not_hold_the_connection(client, monkeypatch):
+    """
+    GIVEN una lista de tareas lo bastante grande para enviarse en streaming
+    WHEN se pide con HEAD (el cuerpo no se recorre) y después se crea una tarea y se vuelve a pedir la lista
+    THEN la creación debe quedar confirmada para otras conexiones y la segunda petición debe responder 200
+    """
+    monkeypatch.setattr(task_service, 'MAX_CACHED_TASKS', 2)
+    for i in range(3):
+        client.post('/api/tasks', json={'title': f'Tarea {i}'})
+    head = client.head('/api/tasks')
+    assert head.status_code == 200
+    head.close() # Como hace el servidor WSGI al terminar, sin haber recorrido el cuerpo
+    assert client.post('/api/tasks', json={'title': 'Nueva'}).get_json()['id'] == 4
+    with sqlite3.connect(task_service.DATABASE_PATH) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM tasks WHERE id = 4").fetchone() == (1,)
+    response = client.get('/api/tasks')
+    assert response.status_code == 200
+    assert len(response.get_json()) == 4
+
 def test_get_single_task(client):
     """
     GIVEN un cliente de prueba de Flask con una tarea
@@ -86,6 +165,17 @@ def test_get_nonexistent_task(client):
     assert response.status_code == 404
     assert "Tarea no encontrada" in response.get_json()['error']
 
+def test_out_of_range_task_id_not_found(client):
+    """
+    GIVEN un cliente de prueba de Flask
+    WHEN se pide, actualiza o elimina una tarea con un ID mayor que un entero de 64 bits
+    THEN la respuesta debe ser 404
+    """
+    url = '/api/tasks/99999999999999999999'
+    assert client.get(url).status_code == 404
+    assert client.put(url, json={'title': 'No existe'}).status_code == 404
+    assert client.delete(url).status_code == 404
+
 def test_update_task(client):
     """
     GIVEN un cliente de prueba de Flask con una tarea
@@ -99,6 +189,49 @@ def test_update_task(client):
     assert json_data['title'] == 'Tarea Actualizada'
     assert json_data['completed'] is True
 
+def test_update_task_invalid_fields(client):
+    """
+    GIVEN un cliente de prueba de Flask con una tarea
+    WHEN se hace una petición PUT con un título vacío o un 'completed' que no es booleano
+    THEN la respuesta debe ser 400 y la tarea no debe cambiar
+    """
+    client.post('/api/tasks', json={'title': 'Tarea Original'})
+    assert client.put('/api/tasks/1', json={'title': '   '}).status_code == 400
+    assert client.put('/api/tasks/1', json={'completed': 'sí'}).status_code == 400
+    assert client.get('/api/tasks/1').get_json() == {'id': 1, 'title': 'Tarea Original', 'completed': False}
+
+@pytest.mark.parametrize("payload, message", [
+    ({'title': 123}, "El campo 'title' debe ser una cadena de texto"),
+    ({'title': None}, "El campo 'title' debe ser una cadena de texto"),
+    ({'title': ''}, "El campo 'title' no puede estar vacío"),
+    ({'completed': 'sí'}, "El campo 'completed' debe ser un booleano"),
+])
+def test_update_task_error_messages(client, payload, message):
+    """
+    GIVEN un cliente de prueba de Flask con una tarea
+    WHEN se hace una petición PUT con un campo de tipo incorrecto, nulo o vacío
+    THEN la respuesta debe ser 400 con un mensaje que distingue el tipo incorrecto del título vacío
+    """
+    client.post('/api/tasks', json={'title': 'Tarea Original'})
+    response = client.put('/api/tasks/1', json=payload)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == message
+
+@pytest.mark.parametrize("payload, message", [
+    ({'title': 123}, "El campo 'title' debe ser una cadena de texto"),
+    ({'title': '   '}, "El campo 'title' no puede estar vacío"),
+    ({'title': 'Tarea', 'completed': 'x'}, "El campo 'completed' debe ser un booleano"),
+])
+def test_create_task_error_messages(client, payload, message):
+    """
+    GIVEN un cliente de prueba de Flask
+    WHEN se hace una petición POST con un campo de tipo incorrecto o un título vacío
+    THEN la respuesta debe ser 400 con el mismo mensaje que devuelve PUT para ese error
+    """
+    response = client.post('/api/tasks', json=payload)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == message
+
 def test_update_nonexistent_task(client):
     """
     GIVEN un cliente de prueba de Flask
@@ -142,3 +275,174 @@ def test_create_task_no_title(client):
     assert response.status_code == 400
     assert "El campo 'title' es requerido" in response.get_json()['error']
 
+
+@pytest.mark.parametrize("payload", [
+    {'title': '   '},
+    {'title': {'a': 1}},
+    {'title': ['x']},
+    {'title': 'ok', 'completed': {}},
+])
+def test_create_task_invalid_field_types(client, payload):
+    """
+    GIVEN un cliente de prueba de Flask
+    WHEN se hace una petición POST a '/api/tasks' con campos de tipo no válido
+    THEN la respuesta debe ser 400 y no se debe consumir ningún ID
+    """
+    response = client.post('/api/tasks', json=payload)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+    assert client.post('/api/tasks', json={'title': 'Válida'}).get_json()['id'] == 1
+
+def test_concurrent_creates_keep_id_order(client):
+    """
+    GIVEN varios hilos creando tareas a la vez
+    WHEN se obtiene la lista de tareas
+    THEN cada tarea debe tener un ID único y la lista debe estar en el mismo orden que los IDs
+    """
+    created = []
+    def create_many():
+        for i in range(25):
+            created.append(task_service.create_task(f'Tarea {i}').id)
+    threads = [threading.Thread(target=create_many) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ids = [t['id'] for t in client.get('/api/tasks').get_json()]
+    assert sorted(created) == list(range(1, 201))
+    assert ids == sorted(ids) == sorted(created)
+
+@pytest.mark.parametrize("body", [b'["no", "es", "un", "objeto"]', b'{no es json', b'"texto"'])
+def test_create_task_invalid_body(client, body):
+    """
+    GIVEN un cliente de prueba de Flask
+    WHEN se hace una petición POST a '/api/tasks' cuyo cuerpo no es un objeto JSON
+    THEN la respuesta debe ser 400
+    """
+    response = client.post('/api/tasks', data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+def test_batch_operations(client):
+    """
+    GIVEN un cliente de prueba de Flask con dos tareas
+    WHEN se hace una petición POST a '/api/tasks/batch' con creaciones, actualizaciones y eliminaciones
+    THEN la respuesta debe ser 200 con el resultado de cada operación, en orden
+    """
+    client.post('/api/tasks', json={'title': 'Tarea 1'})
+    client.post('/api/tasks', json={'title': 'Tarea 2'})
+    response = client.post('/api/tasks/batch', json={
+        'create': [{'title': 'Tarea 3'}, {'title': '   '}],
+        'update': [{'id': 1, 'completed': True}, {'id': 999, 'title': 'No existe'}],
+        'delete': [2, 999],
+    })
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [r['status'] for r in results] == [201, 400, 200, 404, 200, 404]
+    assert results[0]['task']['id'] == 3
+    assert results[2]['task'] == {'id': 1, 'title': 'Tarea 1', 'completed': True}
+
+    # La creación inválida no consume un ID ni deja rastro
+    tasks = client.get('/api/tasks').get_json()
+    assert [t['id'] for t in tasks] == [1, 3]
+
+def test_batch_invalid_body(client):
+    """
+    GIVEN un cliente de prueba de Flask
+    WHEN se hace una petición POST a '/api/tasks/batch' con un cuerpo que no es un objeto
+    THEN la respuesta debe ser 400
+    """
+    response = client.post('/api/tasks/batch', json=[1, 2, 3])
+    assert response.status_code == 400
+
+def test_batch_rejects_boolean_ids(client):
+    """
+    GIVEN un cliente de prueba de Flask con una tarea
+    WHEN se hace un lote que usa true como ID para actualizar y eliminar
+    THEN esas operaciones deben responder 400 y la tarea 1 no debe cambiar
+    """
+    client.post('/api/tasks', json={'title': 'Tarea 1'})
+    response = client.post('/api/tasks/batch', json={
+        'update': [{'id': True, 'completed': True}],
+        'delete': [True],
+    })
+    assert [r['status'] for r in response.get_json()['results']] == [400, 400]
+    assert client.get('/api/tasks/1').get_json() == {'id': 1, 'title': 'Tarea 1', 'completed': False}
+
+def test_batch_invalid_operations_reported_individually(client):
+    """
+    GIVEN un cliente de prueba de Flask con una tarea
+    WHEN se hace un lote con tipos inválidos e IDs inexistentes junto a operaciones válidas
+    THEN cada operación inválida debe responder 400 o 404 sin deshacer las válidas
+    """
+    client.post('/api/tasks', json={'title': 'Tarea 1'})
+    response = client.post('/api/tasks/batch', json={
+        'create': [{'title': {'a': 1}}, {'title': 'Tarea 2', 'completed': [True]}, {'title': 'Tarea 2'}],
+        'update': [{'id': -1, 'completed': True}, {'id': 1, 'title': ['x']}],
+        'delete': [0],
+    })
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [r['status'] for r in results] == [400, 400, 201, 404, 400, 404]
+    assert [t['id'] for t in client.get('/api/tasks').get_json()] == [1, 2]
+
+def test_batch_too_many_operations(client):
+    """
+    GIVEN un cliente de prueba de Flask
+    WHEN se hace un lote con más operaciones que el máximo permitido
+    THEN la respuesta debe ser 413 y no se debe ejecutar ninguna operación
+    """
+    response = client.post('/api/tasks/batch', json={
+        'create': [{'title': 'Tarea'}] * MAX_BATCH_OPERATIONS,
+        'delete': [1],
+    })
+    assert response.status_code == 413
+    assert 'error' in response.get_json()
+    assert client.get('/api/tasks').get_json() == []
+
+def test_tasks_persist_across_connections(client):
+    """
+    GIVEN una tarea creada a través de la API
+    WHEN se lee desde otro hilo (otra conexión) y directamente desde el archivo SQLite
+    THEN la tarea debe estar disponible en ambos casos
+    """
+    client.post('/api/tasks', json={'title': 'Persistente'})
+
+    found = []
+    reader = threading.Thread(target=lambda: found.append(task_service.get_task_by_id(1)))
+    reader.start()
+    reader.join()
+    assert found[0] is not None and found[0].title == 'Persistente'
+
+    with sqlite3.connect(task_service.DATABASE_PATH) as conn:
+        assert conn.execute("SELECT title, completed FROM tasks WHERE id = 1").fetchone() == ('Persistente', 0)
+
+def test_reset_state_restarts_id_sequence(client):
+    """
+    GIVEN tareas ya creadas
+    WHEN se reinicia el estado del servicio
+    THEN no quedan tareas y la siguiente tarea vuelve a tener el ID 1
+    """
+    client.post('/api/tasks', json={'title': 'Tarea 1'})
+    client.post('/api/tasks', json={'title': 'Tarea 2'})
+    task_service._reset_state()
+    assert client.get('/api/tasks').get_json() == []
+    assert client.post('/api/tasks', json={'title': 'Nueva'}).get_json()['id'] == 1
+
+def test_version_increases_on_every_change(client):
+    """
+    GIVEN el servicio de tareas
+    WHEN se crea, actualiza y elimina una tarea
+    THEN la versión de los datos aumenta en cada cambio, y no cambia si la operación no afecta a ninguna tarea
+    """
+    v0 = task_service.get_tasks_version()
+    client.post('/api/tasks', json={'title': 'Versionada'})
+    v1 = task_service.get_tasks_version()
+    client.put('/api/tasks/1', json={'completed': True})
+    v2 = task_service.get_tasks_version()
+    client.put('/api/tasks/999', json={'completed': True})
+    assert task_service.get_tasks_version() == v2
+    client.delete('/api/tasks/1')
+    v3 = task_service.get_tasks_version()
+    assert v0 < v1 < v2 < v3
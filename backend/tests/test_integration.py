@@ -11,30 +11,48 @@ from testcontainers.core.waiting_utils import wait_for_logs
 # Usamos dirname dos veces para subir de 'tests' a 'backend'.
 DOCKERFILE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-@pytest.fixture(scope="module")
+IMAGE_TAG = "test-app-my-project:latest"  # Nombre de imagen válido y en minúsculas
+
+def _image_exists(client, image_tag):
+    try:
+        client.images.get(image_tag)
+        return True
+    except docker.errors.ImageNotFound:
+        return False
+
+@pytest.fixture(scope="session")
 def app_container():
     """
     Esta fixture construye la imagen Docker explícitamente usando la librería `docker`,
     luego la inicia con testcontainers. Esto evita problemas de interpretación de rutas
     que ocurren en Windows.
+
+    El contenedor se levanta una sola vez para toda la sesión de pruebas. Si la imagen ya
+    se construyó fuera de las pruebas (por ejemplo en CI), se puede omitir la construcción
+    con SKIP_BUILD=1.
     """
     # Usamos la librería 'docker' para construir la imagen explícitamente.
     client = docker.from_env()
-    image_tag = "test-app-my-project:latest"  # Nombre de imagen válido y en minúsculas
-    try:
-        print(f"\nBuilding image '{image_tag}' from path '{DOCKERFILE_PATH}'...")
-        client.images.build(path=DOCKERFILE_PATH, tag=image_tag, rm=True, forcerm=True)
-        print("Image built successfully.")
-    except docker.errors.BuildError as e:
-        print("\n--- DOCKER BUILD FAILED ---")
-        for line in e.build_log:
-            if 'stream' in line:
-                print(line['stream'].strip())
-        print("---------------------------\n")
-        pytest.fail(f"Docker image build failed: {e}")
+    image_tag = IMAGE_TAG
+    if os.environ.get("SKIP_BUILD") == "1" and _image_exists(client, image_tag):
+        print(f"\nSKIP_BUILD=1: using existing image '{image_tag}'.")
+    else:
+        try:
+            print(f"\nBuilding image '{image_tag}' from path '{DOCKERFILE_PATH}'...")
+            client.images.build(path=DOCKERFILE_PATH, tag=image_tag, rm=True, forcerm=True)
+            print("Image built successfully.")
+        except docker.errors.BuildError as e:
+            print("\n--- DOCKER BUILD FAILED ---")
+            for line in e.build_log:
+                if 'stream' in line:
+                    print(line['stream'].strip())
+            print("---------------------------\n")
+            pytest.fail(f"Docker image build failed: {e}")
 
     # Ahora, usamos testcontainers para correr el contenedor desde la imagen ya construida.
-    with DockerContainer(image=image_tag).with_exposed_ports(5000) as container:
+    # ENABLE_TEST_RESET habilita el endpoint que reinicia el estado entre pruebas.
+    container = DockerContainer(image=image_tag).with_exposed_ports(5000).with_env("ENABLE_TEST_RESET", "1")
+    with container:
         # Espera a que el contenedor muestre un log que indique que la app está lista.
         # Gunicorn nos avisará cuando esté escuchando en el puerto.
         wait_for_logs(container, "Booting worker", timeout=60)
@@ -47,6 +65,12 @@ def app_container():
         print(f"Container is ready at http://{host}:{port}")
         yield f"http://{host}:{port}"
 
+@pytest.fixture(autouse=True)
+def reset_state(app_container):
+    """Reinicia las tareas del contenedor antes de cada prueba, ya que el contenedor es compartido."""
+    response = requests.post(f"{app_container}/api/internal/reset")
+    assert response.status_code == 204
+
 def test_integration_health_check(app_container):
     """
     GIVEN el contenedor de la aplicación corriendo
@@ -76,11 +100,10 @@ def test_scenario_create_get_update_delete(app_container):
     base_url = f"{app_container}/api/tasks"
     
     # 1. Limpiar y verificar que la lista de tareas está vacía
-    # (Hacemos esto obteniendo todas las tareas y eliminándolas una por una)
+    # (Hacemos esto obteniendo todas las tareas y eliminándolas en un solo lote)
     initial_tasks_resp = requests.get(base_url)
     assert initial_tasks_resp.status_code == 200
-    for task in initial_tasks_resp.json():
-        requests.delete(f"{base_url}/{task['id']}")
+    requests.post(f"{base_url}/batch", json={'delete': [task['id'] for task in initial_tasks_resp.json()]})
     
     final_tasks_resp = requests.get(base_url)
     assert final_tasks_resp.json() == []
@@ -269,8 +292,7 @@ def test_create_and_get_multiple_tasks(app_container):
     
     # Limpiar estado previo
     initial_tasks_resp = requests.get(base_url)
-    for task in initial_tasks_resp.json():
-        requests.delete(f"{base_url}/{task['id']}")
+    requests.post(f"{base_url}/batch", json={'delete': [task['id'] for task in initial_tasks_resp.json()]})
         
     # Crear 3 tareas
     task1 = requests.post(base_url, json={'title': 'Task 1'}).json()
@@ -291,8 +313,7 @@ def test_create_and_get_multiple_tasks(app_container):
     assert response_ids == expected_ids
     
     # Limpieza
-    for task_id in expected_ids:
-        requests.delete(f"{base_url}/{task_id}")
+    requests.post(f"{base_url}/batch", json={'delete': list(expected_ids)})
 
 # --- Set 9: Pruebas de Casos Borde y Edge Cases ---
 
@@ -385,8 +406,7 @@ def test_complex_delete_scenario(app_container):
     base_url = f"{app_container}/api/tasks"
 
     # Limpiar
-    for task in requests.get(base_url).json():
-        requests.delete(f"{base_url}/{task['id']}")
+    requests.post(f"{base_url}/batch", json={'delete': [task['id'] for task in requests.get(base_url).json()]})
 
     # Crear 5 tareas
     ids = [requests.post(base_url, json={'title': f'T{i}'}).json()['id'] for i in range(5)]
@@ -411,13 +431,30 @@ def test_get_all_tasks_is_initially_empty(app_container):
     base_url = f"{app_container}/api/tasks"
     
     # Limpiar por si acaso
-    for task in requests.get(base_url).json():
-        requests.delete(f"{base_url}/{task['id']}")
+    requests.post(f"{base_url}/batch", json={'delete': [task['id'] for task in requests.get(base_url).json()]})
 
     # Verificar que está vacío
     resp = requests.get(base_url)
     assert resp.status_code == 200
     assert resp.json() == []
 
+def test_batch_create_and_delete(app_container):
+    """
+    GIVEN la API corriendo
+    WHEN se crean y luego se eliminan varias tareas con '/api/tasks/batch'
+    THEN cada operación debe informar su resultado y las tareas ya no deben existir.
+    """
+    base_url = f"{app_container}/api/tasks"
+
+    create_resp = requests.post(f"{base_url}/batch", json={'create': [{'title': 'Lote 1'}, {'title': 'Lote 2'}]})
+    assert create_resp.status_code == 200
+    created = create_resp.json()['results']
+    assert [r['status'] for r in created] == [201, 201]
+    ids = [r['task']['id'] for r in created]
 
+    delete_resp = requests.post(f"{base_url}/batch", json={'delete': ids})
+    assert delete_resp.status_code == 200
+    assert [r['status'] for r in delete_resp.json()['results']] == [200, 200]
 
+    for task_id in ids:
+        assert requests.get(f"{base_url}/{task_id}").status_code == 404